@@ -0,0 +1,211 @@
+"""Reference tracking and garbage collection for synthesized audio clips.
+
+Every patient utterance becomes an MP3 in ``audio_cache/``. Clips are owned by
+the call that played them and released when the call ends; fillers and other
+start-up clips are pinned. A background collector deletes unreferenced clips
+once they are older than the grace period (Twilio fetches a clip a moment
+after we hand it the TwiML), and evicts the oldest unreferenced clips early if
+the cache is over its byte quota.
+
+Environment:
+    AUDIO_CACHE_QUOTA_MB    byte quota for audio_cache/       (default: 500)
+    AUDIO_CACHE_GRACE_S     keep released clips at least this long (default: 300)
+    AUDIO_GC_INTERVAL_S     seconds between collector runs     (default: 60)
+"""
+
+import os
+import time
+import asyncio
+import logging
+
+from voice_synthesizer import AUDIO_DIR
+
+logger = logging.getLogger(__name__)
+
+QUOTA_BYTES = int(float(os.getenv("AUDIO_CACHE_QUOTA_MB", "500")) * 1024 * 1024)
+GRACE_SECONDS = float(os.getenv("AUDIO_CACHE_GRACE_S", "300"))
+GC_INTERVAL = float(os.getenv("AUDIO_GC_INTERVAL_S", "60"))
+# Calls that never got a /call-status callback stop holding their clips after this.
+STALE_CALL_SECONDS = 3600
+# Never evict anything this fresh, even over quota — it may be about to be tracked.
+MIN_AGE_SECONDS = 30
+
+
+class AudioStore:
+    def __init__(
+        self,
+        root: str = AUDIO_DIR,
+        quota_bytes: int = QUOTA_BYTES,
+        grace_seconds: float = GRACE_SECONDS,
+    ):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.grace_seconds = grace_seconds
+
+        self._pinned: set[str] = set()
+        self._calls: dict[str, set[str]] = {}
+        self._call_started: dict[str, float] = {}
+        self._released: dict[str, float] = {}
+        # Calls already released, so clips synthesized after /call-status aren't re-pinned.
+        self._ended: dict[str, float] = {}
+        self._task: asyncio.Task | None = None
+
+        self.reclaimed_bytes = 0
+        self.reclaimed_files = 0
+        self.file_count = 0
+        self.total_bytes = 0
+        self.last_run: float | None = None
+
+    # ── Reference tracking ──
+
+    def pin(self, filename: str):
+        """Keep a clip for the lifetime of the server (fillers, opening lines)."""
+        self._pinned.add(filename)
+
+    def track(self, call_sid: str, filename: str):
+        """Mark a clip as in use by an active call.
+
+        If the call has already ended, the clip goes straight into its grace period.
+        """
+        if call_sid in self._ended:
+            self._released[filename] = time.time()
+            return
+        self._calls.setdefault(call_sid, set()).add(filename)
+        self._call_started.setdefault(call_sid, time.time())
+
+    def release_call(self, call_sid: str):
+        """Drop every reference held by a finished call; clips start their grace period."""
+        now = time.time()
+        for filename in self._calls.pop(call_sid, ()):
+            self._released[filename] = now
+        self._call_started.pop(call_sid, None)
+        self._ended[call_sid] = now
+
+    def _referenced(self) -> set[str]:
+        cutoff = time.time() - STALE_CALL_SECONDS
+        for call_sid, ended in list(self._ended.items()):
+            if ended < cutoff:
+                del self._ended[call_sid]
+        for call_sid, started in list(self._call_started.items()):
+            if started < cutoff:
+                logger.warning("Releasing clips for stale call sid=%s", call_sid)
+                self.release_call(call_sid)
+        referenced = set(self._pinned)
+        for files in self._calls.values():
+            referenced |= files
+        return referenced
+
+    # ── Collection ──
+
+    def _scan(self) -> list[tuple[str, str, int, float]]:
+        """Return (relative name, path, size, mtime) for every clip on disk."""
+        clips = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if not name.endswith(".mp3"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                rel = os.path.relpath(path, self.root).replace(os.sep, "/")
+                clips.append((rel, path, st.st_size, st.st_mtime))
+        return clips
+
+    def _collect(self, referenced: set[str], released: dict[str, float]) -> tuple[int, int]:
+        """Delete expired and over-quota clips. Runs in a worker thread."""
+        now = time.time()
+        clips = self._scan()
+        total = sum(size for _, _, size, _ in clips)
+        freed_bytes = freed_files = 0
+
+        candidates = []
+        for rel, path, size, mtime in clips:
+            if rel in referenced:
+                continue
+            last_used = max(mtime, released.get(rel, 0.0))
+            candidates.append((last_used, rel, path, size))
+        candidates.sort()
+
+        for last_used, rel, path, size in candidates:
+            age = now - last_used
+            expired = age >= self.grace_seconds
+            over_quota = total - freed_bytes > self.quota_bytes and age >= MIN_AGE_SECONDS
+            if not expired and not over_quota:
+                # Sorted oldest first, so nothing later qualifies either.
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            freed_bytes += size
+            freed_files += 1
+
+        self.file_count = len(clips) - freed_files
+        self.total_bytes = total - freed_bytes
+        return freed_bytes, freed_files
+
+    async def collect(self) -> tuple[int, int]:
+        """Run one collection pass. Returns (bytes freed, files freed)."""
+        referenced = self._referenced()
+        released = dict(self._released)
+        freed_bytes, freed_files = await asyncio.to_thread(self._collect, referenced, released)
+
+        on_disk = set()
+        for name in released:
+            if os.path.exists(os.path.join(self.root, name)):
+                on_disk.add(name)
+        for name in released.keys() - on_disk:
+            self._released.pop(name, None)
+
+        self.reclaimed_bytes += freed_bytes
+        self.reclaimed_files += freed_files
+        self.last_run = time.time()
+        if freed_files:
+            logger.info(
+                "Audio GC freed %d file(s), %.1f MB — %d file(s), %.1f MB remain",
+                freed_files, freed_bytes / 1e6, self.file_count, self.total_bytes / 1e6,
+            )
+        if self.total_bytes > self.quota_bytes:
+            logger.warning(
+                "audio_cache is %.1f MB, over its %.1f MB quota — remaining clips are in use or too recent",
+                self.total_bytes / 1e6, self.quota_bytes / 1e6,
+            )
+        return freed_bytes, freed_files
+
+    async def _run(self, interval: float):
+        while True:
+            try:
+                await self.collect()
+            except Exception:
+                logger.exception("Audio GC pass failed")
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float = GC_INTERVAL):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "file_count": self.file_count,
+            "total_bytes": self.total_bytes,
+            "quota_bytes": self.quota_bytes,
+            "reclaimed_files": self.reclaimed_files,
+            "reclaimed_bytes": self.reclaimed_bytes,
+            "pinned": len(self._pinned),
+            "active_calls": len(self._calls),
+            "last_run": self.last_run,
+        }
+
+
+audio_store = AudioStore()
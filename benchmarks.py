@@ -0,0 +1,374 @@
+"""Micro-benchmarks for the request-path hot spots, with stored baselines.
+
+    python benchmarks.py                    # run and print
+    python benchmarks.py --save             # run and store as the baseline
+    python benchmarks.py --compare          # run and fail on regressions vs the baseline
+                                            # (flagged benchmarks are re-run before failing)
+    python benchmarks.py -k filler          # only benchmarks whose name contains "filler"
+
+External providers (OpenAI, ElevenLabs) are stubbed out, so numbers measure
+our own code only. Webhooks are driven through the ASGI app in-process.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import itertools
+import logging
+import platform
+import statistics
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+# The OpenAI client refuses to construct without a key; nothing is sent.
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import httpx
+from twilio.twiml.voice_response import VoiceResponse
+
+import main
+import patient_brain
+import transcript_logger
+from scenarios import SCENARIOS
+from transcript_logger import TranscriptLogger
+
+BASELINE_FILE = Path("benchmarks") / "baseline.json"
+DEFAULT_THRESHOLD = 0.20  # fail if the best round is >20% slower than the baseline median
+TARGET_ROUND_TIME = 0.04  # seconds per timing round
+ROUNDS = 25
+# A slowdown must also exceed this many baseline standard deviations.
+NOISE_SIGMAS = 3
+# Re-run a flagged benchmark up to this many times before calling it a regression.
+RECHECKS = 2
+
+AGENT_LINES = [
+    "Can you please spell your last name for me?",
+    "And what is your date of birth?",
+    "Is that correct?",
+    "Would you prefer a morning or afternoon appointment?",
+    "Unfortunately we don't have anything available on Sunday.",
+    "Great, I've got you down for Tuesday at 3pm.",
+    "Thank you for calling, how can I help you today?",
+    "Let me check on that for you.",
+]
+
+
+# ── Timing harness ──────────────────────────────────────────────────────
+
+def _calibrate(run_batch) -> int:
+    """Pick a batch size so one round takes roughly TARGET_ROUND_TIME."""
+    n = 1
+    while True:
+        elapsed = run_batch(n)
+        if elapsed >= TARGET_ROUND_TIME or n >= 1_000_000:
+            return n
+        n *= 2 if elapsed == 0 else max(2, min(10, int(TARGET_ROUND_TIME / elapsed) + 1))
+
+
+def _measure(run_batch) -> dict:
+    n = _calibrate(run_batch)
+    per_op = [run_batch(n) / n * 1e6 for _ in range(ROUNDS)]
+    return {
+        "median_us": round(statistics.median(per_op), 3),
+        "min_us": round(min(per_op), 3),
+        "stdev_us": round(statistics.stdev(per_op), 3),
+        "ops_per_round": n,
+    }
+
+
+def bench_sync(fn) -> dict:
+    def run_batch(n: int) -> float:
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        return time.perf_counter() - start
+    return _measure(run_batch)
+
+
+def bench_async(loop: asyncio.AbstractEventLoop, coro_fn) -> dict:
+    async def batch(n: int) -> float:
+        start = time.perf_counter()
+        for _ in range(n):
+            await coro_fn()
+        return time.perf_counter() - start
+    return _measure(lambda n: loop.run_until_complete(batch(n)))
+
+
+# ── Stubs ───────────────────────────────────────────────────────────────
+
+def _fake_completion(text: str = "Sure, my name is James Miller."):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=text), finish_reason="stop")],
+        usage=SimpleNamespace(prompt_tokens=400, completion_tokens=12),
+    )
+
+
+async def _stub_complete(messages, temperature=0.8):
+    return _fake_completion()
+
+
+async def _stub_patient_response(scenario, history, agent_text):
+    return "Sure, my name is James Miller.", False
+
+
+async def _stub_synthesize(text: str) -> str:
+    return "bench.mp3"
+
+
+def _history(turns: int) -> list[dict]:
+    history: list[dict] = []
+    for i in range(turns):
+        history.append({"role": "agent", "text": AGENT_LINES[i % len(AGENT_LINES)]})
+        history.append({"role": "patient", "text": "Sure, my name is James Miller and my date of birth is March 15, 1990."})
+    return history
+
+
+# ── Benchmarks ──────────────────────────────────────────────────────────
+
+def run_benchmarks(selected: str | None = None) -> dict[str, dict]:
+    results: dict[str, dict] = {}
+
+    def want(name: str) -> bool:
+        return selected is None or selected in name
+
+    def record(name: str, result: dict):
+        results[name] = result
+        print(f"  {name:<42} {result['median_us']:>12.2f} µs  (min {result['min_us']:.2f})")
+
+    random.seed(0)
+    main.filler_audio_files[:] = [f"filler_{i}.mp3" for i in range(len(main.FILLER_TEXTS))]
+
+    # Filler selection
+    if want("pick_filler"):
+        record("pick_filler", bench_sync(main._pick_filler))
+    if want("pick_smart_filler"):
+        history = _history(5)
+        lines = itertools.cycle(AGENT_LINES)
+        record("pick_smart_filler", bench_sync(lambda: main._pick_smart_filler(next(lines), history)))
+
+    # TwiML construction
+    def build_gather():
+        vr = VoiceResponse()
+        vr.play("https://example.ngrok.io/audio/bench.mp3")
+        vr.pause(length=1)
+        main._gather(vr, timeout=12, speech_timeout=1)
+        vr.redirect("/handle-silence", method="POST")
+        return str(vr)
+
+    if want("twiml_gather"):
+        record("twiml_gather", bench_sync(build_gather))
+    if want("twiml_response"):
+        def build_response():
+            vr = VoiceResponse()
+            main._gather(vr)
+            return main._twiml(vr)
+        record("twiml_response", bench_sync(build_response))
+
+    loop = asyncio.new_event_loop()
+    try:
+        # Prompt construction at every history length the server can reach
+        original_complete = patient_brain.router.complete
+        patient_brain.router.complete = _stub_complete
+        try:
+            scenario = SCENARIOS[0]
+            for turns in range(main.MAX_TURNS + 1):
+                name = f"patient_prompt_turns_{turns:02d}"
+                if want(name):
+                    history = _history(turns)
+                    record(name, bench_async(
+                        loop,
+                        lambda h=history: patient_brain.get_patient_response(scenario, h, "Is that correct?"),
+                    ))
+        finally:
+            patient_brain.router.complete = original_complete
+
+        # Webhooks through the ASGI app
+        if any(want(n) for n in ("webhook_voice", "webhook_handle_silence", "webhook_handle_response",
+                                 "webhook_get_response", "webhook_call_status")):
+            _bench_webhooks(loop, want, record)
+    finally:
+        loop.close()
+
+    # Transcript save
+    if want("transcript_save_1000"):
+        with tempfile.TemporaryDirectory() as tmp:
+            original_dir = transcript_logger.TRANSCRIPT_DIR
+            transcript_logger.TRANSCRIPT_DIR = tmp
+            try:
+                tl = TranscriptLogger("bench", "CAbenchmark0000000000000000000000")
+                for i in range(1000):
+                    tl.add_entry("AGENT" if i % 2 == 0 else "PATIENT", AGENT_LINES[i % len(AGENT_LINES)] * 4)
+                record("transcript_save_1000", bench_sync(lambda: tl.save(duration=300)))
+            finally:
+                transcript_logger.TRANSCRIPT_DIR = original_dir
+
+    return results
+
+
+def _bench_webhooks(loop, want, record):
+    original = (main.get_patient_response, main.synthesize_speech, transcript_logger.TRANSCRIPT_DIR)
+    main.get_patient_response = _stub_patient_response
+    main.synthesize_speech = _stub_synthesize
+    tmp = tempfile.TemporaryDirectory()
+    transcript_logger.TRANSCRIPT_DIR = tmp.name
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench")
+    counter = iter(range(10**9))
+    scenario = SCENARIOS[0]["name"]
+
+    async def start_call() -> str:
+        sid = f"CAbench{next(counter):026d}"
+        resp = await client.post(f"/voice?scenario={scenario}", data={"CallSid": sid})
+        resp.raise_for_status()
+        return sid
+
+    async def voice():
+        sid = await start_call()
+        main.conversations.pop(sid, None)
+
+    async def handle_silence():
+        sid = await start_call()
+        await client.post("/handle-silence", data={"CallSid": sid})
+        main.conversations.pop(sid, None)
+
+    async def handle_response():
+        sid = await start_call()
+        await client.post("/handle-response", data={"CallSid": sid, "SpeechResult": "What is your date of birth?"})
+        # Include the (stubbed) background task so it doesn't leak into the next iteration
+        while main.response_cache.get(sid) is None:
+            await asyncio.sleep(0)
+        main.conversations.pop(sid, None)
+        main.response_cache.pop(sid, None)
+        main.audio_store.release_call(sid)
+
+    async def get_response():
+        sid = f"CAbench{next(counter):026d}"
+        main.response_cache[sid] = ("bench.mp3", "Sure.", False)
+        await client.post("/get-response", data={"CallSid": sid})
+
+    async def call_status():
+        sid = await start_call()
+        main.conversations[sid]["logger"].add_entry("AGENT", "Hello, how can I help?")
+        await client.post("/call-status", data={"CallSid": sid, "CallDuration": "60", "CallStatus": "completed"})
+
+    try:
+        for name, fn in (
+            ("webhook_voice", voice),
+            ("webhook_handle_silence", handle_silence),
+            ("webhook_handle_response", handle_response),
+            ("webhook_get_response", get_response),
+            ("webhook_call_status", call_status),
+        ):
+            if want(name):
+                record(name, bench_async(loop, fn))
+    finally:
+        loop.run_until_complete(client.aclose())
+        main.get_patient_response, main.synthesize_speech, transcript_logger.TRANSCRIPT_DIR = original
+        tmp.cleanup()
+
+
+# ── Baselines ───────────────────────────────────────────────────────────
+
+def save_baseline(results: dict[str, dict], path: Path = BASELINE_FILE):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    print(f"\nBaseline saved -> {path}")
+
+
+def load_baseline(path: Path = BASELINE_FILE) -> dict[str, dict]:
+    if not path.exists():
+        sys.exit(f"ERROR: No baseline at {path} — run with --save first.")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def _regressed(result: dict, base: dict, threshold: float) -> bool:
+    """Compare the best current round against the baseline median.
+
+    The best round is the least disturbed by other load on the machine, so a
+    noisy run doesn't look slower than it is. The slowdown has to clear both
+    the relative threshold and the baseline's own round-to-round spread.
+    """
+    limit = max(
+        base["median_us"] * (1 + threshold),
+        base["median_us"] + NOISE_SIGMAS * base.get("stdev_us", 0.0),
+    )
+    return result["min_us"] > limit
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    """Print a comparison table. Returns the benchmarks that regressed past ``threshold``."""
+    regressed = []
+    print(f"\n{'benchmark':<42} {'baseline':>12} {'current':>12} {'best':>12} {'change':>9}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<42} {'—':>12} {result['median_us']:>12.2f} {result['min_us']:>12.2f} {'new':>9}")
+            continue
+        change = result["min_us"] / base["median_us"] - 1 if base["median_us"] else 0.0
+        flag = ""
+        if _regressed(result, base, threshold):
+            flag = "  REGRESSION"
+            regressed.append(name)
+        print(f"{name:<42} {base['median_us']:>12.2f} {result['median_us']:>12.2f} "
+              f"{result['min_us']:>12.2f} {change:>+8.1%}{flag}")
+    return regressed
+
+
+def recheck(regressed: list[str], results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+    """Re-run flagged benchmarks, keeping each one's best run. Returns those still regressed."""
+    for attempt in range(1, RECHECKS + 1):
+        if not regressed:
+            break
+        print(f"\nRe-running {len(regressed)} flagged benchmark(s), attempt {attempt} of {RECHECKS}")
+        for name in regressed:
+            rerun = run_benchmarks(name)[name]
+            if rerun["min_us"] < results[name]["min_us"]:
+                results[name] = rerun
+        regressed = compare({name: results[name] for name in regressed}, baseline, threshold)
+    return regressed
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Run component micro-benchmarks")
+    parser.add_argument("-k", dest="select", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--save", action="store_true", help="Store results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="Compare against the stored baseline")
+    parser.add_argument(
+        "--threshold", "-t",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Allowed slowdown before failing, as a fraction (default {DEFAULT_THRESHOLD})",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE, help=f"Baseline file (default {BASELINE_FILE})")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    print(f"Running benchmarks ({ROUNDS} rounds each, median per op)")
+    results = run_benchmarks(args.select)
+
+    if args.compare:
+        baseline = load_baseline(args.baseline)
+        regressed = recheck(compare(results, baseline, args.threshold), results, baseline, args.threshold)
+        if regressed:
+            print(f"\n{len(regressed)} regression(s): {', '.join(regressed)}")
+            sys.exit(1)
+    if args.save:
+        save_baseline(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main_cli()
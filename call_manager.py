@@ -7,16 +7,13 @@ import argparse
 import logging
 
 from twilio.rest import Client
+from twilio.http.http_client import TwilioHttpClient
 from dotenv import load_dotenv
 
 from scenarios import SCENARIOS
 
 load_dotenv()
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s  %(levelname)-8s  %(message)s",
-)
 logger = logging.getLogger("call_manager")
 
 TWILIO_SID = os.getenv("TWILIO_ACCOUNT_SID", "")
@@ -27,10 +24,33 @@ NGROK_URL = os.getenv("NGROK_URL", "").rstrip("/")
 
 DELAY_BETWEEN_CALLS = 120  # seconds
 
+_client: Client | None = None
 
-def make_call(scenario_name: str) -> str:
+
+def get_client() -> Client:
+    """Shared Twilio client. Its HTTP session keeps connections to the API pooled."""
+    global _client
+    if _client is None:
+        _client = Client(
+            TWILIO_SID,
+            TWILIO_TOKEN,
+            http_client=TwilioHttpClient(pool_connections=True, max_retries=3),
+        )
+    return _client
+
+
+def config_error() -> str | None:
+    """Return a description of missing configuration, or None if calls can be placed."""
+    if not NGROK_URL:
+        return "NGROK_URL is not set in .env — start ngrok first."
+    if not TWILIO_SID or not TWILIO_TOKEN or not TWILIO_PHONE:
+        return "Twilio credentials are missing from .env"
+    return None
+
+
+def make_call(scenario_name: str, client: Client | None = None) -> str:
     """Place one outbound call for the given scenario. Returns the CallSid."""
-    client = Client(TWILIO_SID, TWILIO_TOKEN)
+    client = client or get_client()
 
     call = client.calls.create(
         to=TARGET_PHONE,
@@ -49,10 +69,9 @@ def make_call(scenario_name: str) -> str:
 
 def run_scenarios(names: list[str] | None = None, delay: int = DELAY_BETWEEN_CALLS):
     """Run one or more scenarios sequentially with a pause between each."""
-    if not NGROK_URL:
-        sys.exit("ERROR: NGROK_URL is not set in .env — start ngrok first.")
-    if not TWILIO_SID or not TWILIO_TOKEN or not TWILIO_PHONE:
-        sys.exit("ERROR: Twilio credentials are missing from .env")
+    error = config_error()
+    if error:
+        sys.exit(f"ERROR: {error}")
 
     if names:
         selected = [s for s in SCENARIOS if s["name"] in names]
@@ -88,6 +107,11 @@ def run_scenarios(names: list[str] | None = None, delay: int = DELAY_BETWEEN_CAL
 
 
 def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s  %(levelname)-8s  %(message)s",
+    )
+
     parser = argparse.ArgumentParser(description="Place outbound test calls")
     parser.add_argument(
         "--scenario", "-s",
@@ -0,0 +1,283 @@
+"""Pluggable chat-completion backends with latency-based routing.
+
+Configure with ``LLM_BACKENDS``, a comma-separated list of
+``name=model@base_url`` entries. ``@base_url`` is optional and any
+OpenAI-compatible server works, e.g.
+
+    LLM_BACKENDS=openai=gpt-4o-mini,local=llama3.1:8b@http://localhost:11434/v1
+
+With nothing set, a single ``gpt-4o-mini`` backend on api.openai.com is used.
+``LLM_RACE=1`` sends each request to the two fastest backends and keeps
+whichever answers first.
+
+``LLM_TIMEOUT`` (seconds, default 10) applies to every backend, so a hung
+endpoint fails over to the next one instead of holding the turn for the
+SDK's 10-minute default. ``LLM_MAX_RETRIES`` defaults to 0 when there is
+another backend to fail over to and to 2 for a single backend.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+
+from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o-mini"
+MAX_TOKENS = 200
+MIN_TOKENS = 60
+# Headroom over the longest recent answer; 1–3 sentences rarely pass ~80 tokens.
+TOKEN_HEADROOM = 1.5
+EWMA_ALPHA = 0.3
+# Every Nth request also probes a non-preferred backend in the background so
+# its latency stays current and a failed backend can recover.
+EXPLORE_EVERY = 20
+REQUEST_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "10"))
+# None means "decide from the number of backends" (see BackendRouter.from_env).
+MAX_RETRIES = int(os.environ["LLM_MAX_RETRIES"]) if os.getenv("LLM_MAX_RETRIES") else None
+SINGLE_BACKEND_RETRIES = 2
+
+
+class Backend:
+    """One OpenAI-compatible endpoint plus its observed latency and token stats."""
+
+    def __init__(
+        self,
+        name: str,
+        model: str,
+        base_url: str | None = None,
+        api_key: str | None = None,
+        timeout: float = REQUEST_TIMEOUT,
+        max_retries: int = SINGLE_BACKEND_RETRIES,
+    ):
+        self.name = name
+        self.model = model
+        self.base_url = base_url
+        if base_url and api_key is None:
+            # Local servers usually ignore the key but the client insists on one.
+            api_key = os.getenv("LLM_LOCAL_API_KEY", "local")
+        self.client = AsyncOpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            timeout=timeout,
+            max_retries=max_retries,
+        )
+
+        self.requests = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.wins = 0
+        self.consecutive_errors = 0
+        self.ewma_latency: float | None = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._recent_latencies: deque[float] = deque(maxlen=100)
+
+    async def complete(self, messages: list[dict], max_tokens: int, temperature: float):
+        self.requests += 1
+        start = time.perf_counter()
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        except Exception:
+            self.errors += 1
+            self.consecutive_errors += 1
+            raise
+        self.consecutive_errors = 0
+        self._record(time.perf_counter() - start, response)
+        return response
+
+    def _record(self, latency: float, response):
+        self._recent_latencies.append(latency)
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency = EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.ewma_latency
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.prompt_tokens += usage.prompt_tokens or 0
+            self.completion_tokens += usage.completion_tokens or 0
+
+    def score(self) -> float:
+        """Lower is better. Untried backends sort first; failing ones sort last.
+
+        A backend whose last request failed (or that has never succeeded) is
+        only tried again on failover or by the router's background probe.
+        """
+        if self.requests == 0:
+            return 0.0
+        if self.ewma_latency is None or self.consecutive_errors:
+            return float("inf")
+        error_rate = self.errors / self.requests if self.requests else 0.0
+        return self.ewma_latency * (1 + 4 * error_rate)
+
+    def stats(self) -> dict:
+        lat = sorted(self._recent_latencies)
+        return {
+            "model": self.model,
+            "base_url": self.base_url or "https://api.openai.com/v1",
+            "requests": self.requests,
+            "errors": self.errors,
+            "consecutive_errors": self.consecutive_errors,
+            "cancelled": self.cancelled,
+            "wins": self.wins,
+            "ewma_latency_s": round(self.ewma_latency, 3) if self.ewma_latency is not None else None,
+            "p50_latency_s": round(lat[len(lat) // 2], 3) if lat else None,
+            "p95_latency_s": round(lat[int(len(lat) * 0.95)], 3) if lat else None,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+
+class BackendRouter:
+    """Routes each completion to the fastest backend, optionally racing two."""
+
+    def __init__(self, backends: list[Backend], race: bool = False):
+        if not backends:
+            raise ValueError("BackendRouter needs at least one backend")
+        self.backends = backends
+        self.race = race and len(backends) > 1
+        self._calls = 0
+        self._recent_completion_tokens: deque[int] = deque(maxlen=50)
+        self._probes: set[asyncio.Task] = set()
+
+    @classmethod
+    def from_env(cls) -> "BackendRouter":
+        spec = os.getenv("LLM_BACKENDS", "").strip()
+        targets: list[tuple[str, str, str | None]] = []
+        for part in spec.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            name, _, target = part.partition("=")
+            if not target:
+                name, target = part, part
+            model, _, base_url = target.partition("@")
+            targets.append((name.strip(), model.strip(), base_url.strip() or None))
+        if not targets:
+            targets.append(("openai", DEFAULT_MODEL, None))
+        # With somewhere to fail over to, retrying the same backend only delays the turn.
+        retries = MAX_RETRIES
+        if retries is None:
+            retries = 0 if len(targets) > 1 else SINGLE_BACKEND_RETRIES
+        backends = [Backend(name, model, base_url, max_retries=retries) for name, model, base_url in targets]
+        race = os.getenv("LLM_RACE", "").lower() in ("1", "true", "yes")
+        return cls(backends, race=race)
+
+    def max_tokens(self) -> int:
+        """Cap output at a margin over the longest recent answer."""
+        if not self._recent_completion_tokens:
+            return MAX_TOKENS
+        cap = int(max(self._recent_completion_tokens) * TOKEN_HEADROOM)
+        return max(MIN_TOKENS, min(MAX_TOKENS, cap))
+
+    def _ranked(self) -> list[Backend]:
+        return sorted(self.backends, key=lambda b: b.score())
+
+    def _explore(self, ranked: list[Backend], messages: list[dict], max_tokens: int, temperature: float):
+        """Every EXPLORE_EVERY calls, send the same request to a backend the turn
+        isn't using. The reply is discarded; only the backend's stats change."""
+        self._calls += 1
+        # Backends the turn itself may use are measured already.
+        idle = ranked[2:] if self.race else ranked[1:]
+        if not idle or self._calls % EXPLORE_EVERY:
+            return
+        backend = idle[(self._calls // EXPLORE_EVERY) % len(idle)]
+
+        async def probe():
+            try:
+                await backend.complete(messages, max_tokens, temperature)
+            except Exception as exc:
+                logger.info("Probe of %s failed: %s", backend.name, exc)
+
+        task = asyncio.create_task(probe())
+        # Hold a reference until it finishes so the task isn't garbage-collected.
+        self._probes.add(task)
+        task.add_done_callback(self._probes.discard)
+
+    async def complete(self, messages: list[dict], temperature: float = 0.8):
+        """Return the chat completion response from whichever backend served it."""
+        max_tokens = self.max_tokens()
+        ranked = self._ranked()
+        # Copy: the caller appends the reply to its history while the probe runs.
+        self._explore(ranked, list(messages), max_tokens, temperature)
+
+        if self.race:
+            response, backend = await self._race(ranked[:2], messages, max_tokens, temperature)
+        else:
+            response, backend = await self._first_success(ranked, messages, max_tokens, temperature)
+        backend.wins += 1
+
+        if response.choices[0].finish_reason == "length":
+            # Cut off mid-sentence — forget the history so later turns get the full budget.
+            logger.warning("Reply truncated at max_tokens=%d on %s", max_tokens, backend.name)
+            self._recent_completion_tokens.clear()
+            if max_tokens < MAX_TOKENS:
+                try:
+                    response = await backend.complete(messages, MAX_TOKENS, temperature)
+                except Exception as exc:
+                    logger.warning("Retry on %s failed, keeping truncated reply: %s", backend.name, exc)
+                    return response
+
+        if response.choices[0].finish_reason != "length" and response.usage is not None:
+            self._recent_completion_tokens.append(response.usage.completion_tokens)
+
+        return response
+
+    async def _first_success(self, ranked, messages, max_tokens, temperature):
+        last_exc: Exception | None = None
+        for backend in ranked:
+            try:
+                return await backend.complete(messages, max_tokens, temperature), backend
+            except Exception as exc:
+                logger.warning("Backend %s failed: %s", backend.name, exc)
+                last_exc = exc
+        raise last_exc
+
+    async def _race(self, pair, messages, max_tokens, temperature):
+        tasks = {
+            asyncio.create_task(b.complete(messages, max_tokens, temperature)): b
+            for b in pair
+        }
+        pending = set(tasks)
+        last_exc: Exception | None = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result(), tasks[task]
+                    last_exc = task.exception()
+                    logger.warning("Backend %s failed: %s", tasks[task].name, last_exc)
+        finally:
+            for task in pending:
+                task.cancel()
+        raise last_exc
+
+    async def warm_up(self):
+        """Send a 1-token request to every backend so none pays a cold start on Turn 1."""
+        async def one(backend: Backend):
+            try:
+                await backend.complete([{"role": "user", "content": "hi"}], 1, 0.0)
+                logger.info("Warm-up complete: %s (%.2fs)", backend.name, backend.ewma_latency)
+            except Exception:
+                logger.warning("Warm-up failed: %s — Turn 1 may be slow", backend.name)
+
+        await asyncio.gather(*(one(b) for b in self.backends))
+
+    def stats(self) -> dict:
+        return {
+            "race": self.race,
+            "max_tokens": self.max_tokens(),
+            "backends": {b.name: b.stats() for b in self.backends},
+        }
@@ -0,0 +1,298 @@
+"""Logging configuration for the webhook server.
+
+Every concurrent call shares one event loop, so a slow log sink (a piped
+stdout, journald under pressure) stalls all of them. ``LOG_MODE=queue`` moves
+the actual I/O onto a background ``QueueListener`` thread; the request path
+only pays for putting the record on a queue.
+
+Environment:
+    LOG_MODE            sync | queue            (default: sync)
+    LOG_FORMAT          text | json             (default: text)
+    LOG_SAMPLE_EVERY    keep 1 in N of the noisy polling lines (default: 1)
+    LOG_RATE_LIMIT      per-logger records/sec, e.g. "patient_brain=5,voice_synthesizer=5"
+
+Run ``python logging_setup.py --bench`` to measure per-record overhead.
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+import contextvars
+from datetime import datetime, timezone
+
+TEXT_FORMAT = "%(asctime)s  %(levelname)-8s  %(name)s  %(message)s"
+
+# Messages emitted once per Twilio poll / silence redirect. Matched against the
+# unformatted ``record.msg`` template, so arguments don't matter.
+NOISY_MESSAGES = (
+    "get-response: still processing",
+    "SILENCE #",
+)
+
+# Request paths Twilio hits once per poll; their uvicorn access lines are sampled too.
+NOISY_PATHS = ("/get-response", "/handle-silence")
+
+# uvicorn installs its own synchronous handlers on these with propagate=False.
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+CONTEXT_FIELDS = ("call_sid", "turn", "scenario")
+
+_call_context: contextvars.ContextVar[dict] = contextvars.ContextVar("call_context", default={})
+_listener: logging.handlers.QueueListener | None = None
+
+
+def bind_call_context(**fields):
+    """Attach call_sid / turn / scenario to every record logged from this task.
+
+    Tasks spawned with ``asyncio.create_task`` copy the context at creation, so
+    background work started from a webhook inherits the fields.
+    """
+    ctx = dict(_call_context.get())
+    ctx.update({k: v for k, v in fields.items() if v is not None})
+    _call_context.set(ctx)
+
+
+class ContextFilter(logging.Filter):
+    """Copy the current call context onto the record.
+
+    Runs in the logging thread, before the record is handed to the queue —
+    the listener thread can't see the caller's contextvars.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _call_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep 1 in ``every`` records whose template starts with one of ``prefixes``,
+    and 1 in ``every`` uvicorn access lines for one of ``paths``."""
+
+    def __init__(self, prefixes: tuple[str, ...], every: int, paths: tuple[str, ...] = ()):
+        super().__init__()
+        self.prefixes = prefixes
+        self.paths = paths
+        self.every = max(1, every)
+        self._seen: dict[str, int] = {}
+
+    def _sample(self, key: str) -> bool:
+        n = self._seen.get(key, 0)
+        self._seen[key] = n + 1
+        return n % self.every == 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.every == 1:
+            return True
+        if record.name == "uvicorn.access":
+            # args: (client_addr, method, full_path, http_version, status_code)
+            args = record.args
+            if isinstance(args, tuple) and len(args) >= 3 and isinstance(args[2], str):
+                path = args[2].split("?", 1)[0]
+                if path in self.paths:
+                    return self._sample(path)
+            return True
+        if not isinstance(record.msg, str):
+            return True
+        for prefix in self.prefixes:
+            if record.msg.startswith(prefix):
+                return self._sample(prefix)
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket on a single logger. Warnings and above always pass."""
+
+    def __init__(self, rate: float, burst: int | None = None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        self.dropped += 1
+        return False
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Like ``QueueHandler`` but keeps the traceback out of the message text."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with call context fields when present."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key in CONTEXT_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _parse_rate_limits(spec: str) -> dict[str, float]:
+    limits: dict[str, float] = {}
+    for part in spec.split(","):
+        name, sep, rate = part.strip().partition("=")
+        if not sep:
+            continue
+        try:
+            limits[name.strip()] = float(rate)
+        except ValueError:
+            continue
+    return limits
+
+
+def configure_logging(
+    mode: str | None = None,
+    fmt: str | None = None,
+    level: int = logging.INFO,
+    stream=None,
+):
+    """Install root handlers. Safe to call more than once."""
+    global _listener
+
+    mode = (mode or os.getenv("LOG_MODE", "sync")).lower()
+    fmt = (fmt or os.getenv("LOG_FORMAT", "text")).lower()
+
+    stop_logging()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.setLevel(level)
+
+    sink = logging.StreamHandler(stream or sys.stderr)
+    sink.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    if mode == "queue":
+        q: queue.SimpleQueue = queue.SimpleQueue()
+        front: logging.Handler = _QueueHandler(q)
+        _listener = logging.handlers.QueueListener(q, sink, respect_handler_level=True)
+        _listener.start()
+    else:
+        front = sink
+
+    front.addFilter(ContextFilter())
+    sample_every = int(os.getenv("LOG_SAMPLE_EVERY", "1"))
+    if sample_every > 1:
+        front.addFilter(SamplingFilter(NOISY_MESSAGES, sample_every, NOISY_PATHS))
+    root.addHandler(front)
+
+    # Route uvicorn's loggers through the root handler (and so the queue) instead of
+    # the synchronous StreamHandlers its default LOGGING_CONFIG attaches.
+    for name in UVICORN_LOGGERS:
+        target = logging.getLogger(name)
+        for handler in target.handlers[:]:
+            target.removeHandler(handler)
+        target.propagate = True
+
+    for name, rate in _parse_rate_limits(os.getenv("LOG_RATE_LIMIT", "")).items():
+        target = logging.getLogger(name)
+        for f in target.filters[:]:
+            if isinstance(f, RateLimitFilter):
+                target.removeFilter(f)
+        target.addFilter(RateLimitFilter(rate))
+
+
+def stop_logging():
+    """Flush and stop the background listener, if one is running."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+# ── Overhead benchmark ──────────────────────────────────────────────────
+
+class _SlowStream:
+    """Stand-in for a congested stdout: every write blocks for ``delay`` seconds."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def write(self, s: str):
+        if self.delay:
+            time.sleep(self.delay)
+        return len(s)
+
+    def flush(self):
+        pass
+
+
+def benchmark(records: int = 5000, sink_delay_ms: float = 0.0) -> dict[str, float]:
+    """Return mean microseconds spent in the caller per ``logger.info`` call."""
+    results: dict[str, float] = {}
+    log = logging.getLogger("voicebot.bench")
+    for mode in ("sync", "queue"):
+        for fmt in ("text", "json"):
+            configure_logging(mode=mode, fmt=fmt, stream=_SlowStream(sink_delay_ms / 1000))
+            bind_call_context(call_sid="CAbench", turn=1, scenario="bench")
+            start = time.perf_counter()
+            for i in range(records):
+                log.info("TURN %d  sid=%s  AGENT: %s", i, "CAbench", "How can I help you today?")
+            elapsed = time.perf_counter() - start
+            stop_logging()
+            results[f"{mode}/{fmt}"] = elapsed / records * 1e6
+    configure_logging()
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure logging overhead per record")
+    parser.add_argument("--bench", action="store_true", help="Run the overhead benchmark")
+    parser.add_argument("--records", "-n", type=int, default=5000)
+    parser.add_argument(
+        "--sink-delay", type=float, default=0.0,
+        help="Simulated milliseconds per write on the sink (default 0)",
+    )
+    args = parser.parse_args()
+
+    if not args.bench:
+        parser.print_help()
+        sys.exit(0)
+
+    results = benchmark(args.records, args.sink_delay)
+    print(f"{args.records} records, sink delay {args.sink_delay}ms")
+    for name, us in results.items():
+        print(f"  {name:<12} {us:8.2f} µs/record (caller side)")
@@ -19,12 +19,14 @@ from fastapi import FastAPI, Request
 from fastapi.responses import Response
 from fastapi.staticfiles import StaticFiles
 from twilio.twiml.voice_response import VoiceResponse
-from openai import AsyncOpenAI
 
 from scenarios import SCENARIOS
-from patient_brain import get_patient_response
+from patient_brain import get_patient_response, router as llm_router
 from voice_synthesizer import synthesize_speech
+from audio_store import audio_store
+from orchestrator import orchestrator, router as runs_router
 from transcript_logger import TranscriptLogger
+from logging_setup import configure_logging, stop_logging, bind_call_context
 
 FILLER_TEXTS = [
     # Short — always safe
@@ -41,14 +43,9 @@ filler_audio_files: list[str] = []
 _last_filler_index: int = -1
 response_cache: dict[str, tuple | None] = {}
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s  %(levelname)-8s  %(name)s  %(message)s",
-)
+configure_logging()
 logger = logging.getLogger("voicebot")
 
-_warmup_client = AsyncOpenAI()
-
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -57,27 +54,28 @@ async def lifespan(app: FastAPI):
     for text in FILLER_TEXTS:
         try:
             audio_file = await synthesize_speech(text)
+            audio_store.pin(audio_file)
             filler_audio_files.append(audio_file)
             logger.info("Filler ready: %s -> %s", text, audio_file)
         except Exception:
             logger.warning("Failed to pre-generate filler: %s", text)
     logger.info("Pre-generation complete. %d fillers ready.", len(filler_audio_files))
 
-    try:
-        logger.info("Warming up OpenAI...")
-        await _warmup_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": "hi"}],
-            max_tokens=1,
-        )
-        logger.info("OpenAI warm-up complete.")
-    except Exception:
-        logger.warning("OpenAI warm-up failed — Turn 1 may be slow")
+    logger.info("Warming up LLM backends...")
+    await llm_router.warm_up()
+
+    audio_store.start()
+    orchestrator.load_journals()
 
     yield
 
+    await orchestrator.shutdown()
+    await audio_store.stop()
+    stop_logging()
+
 
 app = FastAPI(title="Voice Bot — Pretty Good AI Tester", lifespan=lifespan)
+app.include_router(runs_router)
 
 NGROK_URL = os.getenv("NGROK_URL", "").rstrip("/")
 MAX_TURNS = 15
@@ -91,6 +89,16 @@ Path("audio_cache").mkdir(exist_ok=True)
 async def health():
     return {"status": "ok"}
 
+
+@app.get("/llm-stats")
+async def llm_stats():
+    return llm_router.stats()
+
+
+@app.get("/audio-stats")
+async def audio_stats():
+    return audio_store.stats()
+
 app.mount("/audio", StaticFiles(directory="audio_cache"), name="audio")
 
 
@@ -148,6 +156,15 @@ def _pick_smart_filler(agent_text: str, history: list[dict]) -> str | None:
     return _pick_filler()
 
 
+def _bind_call(call_sid: str):
+    """Bind call_sid plus the conversation's scenario and turn to log records."""
+    conv = conversations.get(call_sid)
+    if conv is None:
+        bind_call_context(call_sid=call_sid)
+    else:
+        bind_call_context(call_sid=call_sid, scenario=conv["scenario"]["name"], turn=conv["turns"])
+
+
 def _twiml(vr: VoiceResponse) -> Response:
     return Response(content=str(vr), media_type="application/xml")
 
@@ -162,7 +179,7 @@ def _gather(vr: VoiceResponse, timeout: int = 12, speech_timeout: int = 1):
     )
 
 
-async def _speak(vr: VoiceResponse, text: str, play_filler: bool = False):
+async def _speak(vr: VoiceResponse, text: str, call_sid: str, play_filler: bool = False):
     """Speak text using ElevenLabs, falling back to Polly if it fails."""
     if play_filler:
         filler = _pick_filler()
@@ -171,6 +188,7 @@ async def _speak(vr: VoiceResponse, text: str, play_filler: bool = False):
 
     try:
         audio_file = await synthesize_speech(text)
+        audio_store.track(call_sid, audio_file)
         vr.play(f"{NGROK_URL}/audio/{audio_file}")
     except Exception:
         logger.warning("ElevenLabs failed — falling back to Polly")
@@ -194,6 +212,7 @@ async def _process_and_cache(call_sid: str, conv: dict, agent_text: str):
 
     try:
         audio_file = await synthesize_speech(patient_text)
+        audio_store.track(call_sid, audio_file)
         t3 = time.time()
     except Exception:
         logger.exception("ElevenLabs failed in background task")
@@ -219,6 +238,7 @@ async def voice_webhook(request: Request):
         (s for s in SCENARIOS if s["name"] == scenario_name),
         SCENARIOS[0],
     )
+    bind_call_context(call_sid=call_sid, scenario=scenario["name"], turn=0)
 
     conversations[call_sid] = {
         "scenario": scenario,
@@ -230,6 +250,7 @@ async def voice_webhook(request: Request):
     }
 
     logger.info("CALL STARTED  sid=%s  scenario=%s", call_sid, scenario["name"])
+    orchestrator.call_started(call_sid)
 
     vr = VoiceResponse()
     vr.pause(length=4)
@@ -249,6 +270,7 @@ async def handle_silence(request: Request):
         vr.hangup()
         return _twiml(vr)
 
+    bind_call_context(call_sid=call_sid, scenario=conv["scenario"]["name"], turn=conv["turns"])
     conv["silence_count"] = conv.get("silence_count", 0) + 1
     silence = conv["silence_count"]
     logger.info("SILENCE #%d  sid=%s", silence, call_sid)
@@ -260,7 +282,7 @@ async def handle_silence(request: Request):
         conv["history"].append({"role": "patient", "text": opening})
 
         vr = VoiceResponse()
-        await _speak(vr, opening)
+        await _speak(vr, opening, call_sid)
         vr.pause(length=1)
         _gather(vr, timeout=12, speech_timeout=2)
         vr.redirect("/handle-silence", method="POST")
@@ -297,6 +319,7 @@ async def handle_response(request: Request):
     conv["silence_count"] = 0
     conv["turns"] += 1
     turn = conv["turns"]
+    bind_call_context(call_sid=call_sid, scenario=conv["scenario"]["name"], turn=turn)
 
     if not agent_text:
         logger.info("TURN %d  sid=%s  empty speech — redirecting to silence handler", turn, call_sid)
@@ -305,6 +328,7 @@ async def handle_response(request: Request):
         return _twiml(vr)
 
     logger.info("TURN %d  sid=%s  AGENT: %s", turn, call_sid, agent_text)
+    orchestrator.call_turn(call_sid, turn)
     conv["logger"].add_entry("AGENT", agent_text)
     conv["history"].append({"role": "agent", "text": agent_text})
 
@@ -315,7 +339,7 @@ async def handle_response(request: Request):
         conv["history"].append({"role": "patient", "text": goodbye})
 
         vr = VoiceResponse()
-        await _speak(vr, goodbye)
+        await _speak(vr, goodbye, call_sid)
         vr.pause(length=1)
         vr.hangup()
         return _twiml(vr)
@@ -338,6 +362,7 @@ async def get_response(request: Request):
     form = await request.form()
     call_sid = form.get("CallSid", "unknown")
 
+    _bind_call(call_sid)
     result = response_cache.get(call_sid)
 
     if result is None:
@@ -375,17 +400,22 @@ async def call_status(request: Request):
     call_sid = form.get("CallSid", "unknown")
     duration = form.get("CallDuration", "0")
     status = form.get("CallStatus", "unknown")
+    _bind_call(call_sid)
 
     logger.info("CALL ENDED  sid=%s  status=%s  duration=%ss", call_sid, status, duration)
 
+    audio_store.release_call(call_sid)
     conv = conversations.pop(call_sid, None)
+    filepath = None
     if conv:
         filepath = conv["logger"].save(duration=int(duration))
         logger.info("Transcript saved -> %s", filepath)
+    orchestrator.call_ended(call_sid, status, int(duration), filepath)
 
     return Response(content="OK", media_type="text/plain")
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # log_config=None keeps uvicorn from replacing our handlers with its own sync ones
+    uvicorn.run(app, host="0.0.0.0", port=8000, log_config=None)
\ No newline at end of file
@@ -0,0 +1,364 @@
+"""Async test-run orchestration, embedded in the webhook server.
+
+Submit a run (scenarios × repetitions, at a given concurrency) with
+``POST /runs``; calls are placed through one shared Twilio client and a call
+slot is held until Twilio reports the call finished via ``/call-status``.
+``GET /runs/{id}/events`` streams per-call progress as Server-Sent Events.
+
+Every state change is appended to ``runs/<id>.jsonl``. On start-up the journals
+are replayed; runs that were cut short show up as ``interrupted`` and can be
+continued with ``POST /runs/{id}/resume``.
+"""
+
+import json
+import time
+import uuid
+import asyncio
+import logging
+from datetime import datetime
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from scenarios import SCENARIOS
+from call_manager import make_call, get_client, config_error
+
+logger = logging.getLogger(__name__)
+
+RUNS_DIR = "runs"
+# Give up waiting for /call-status after this long and free the slot.
+CALL_TIMEOUT = 15 * 60
+TERMINAL = {"completed", "busy", "no-answer", "canceled", "failed", "timeout"}
+
+
+class RunRequest(BaseModel):
+    scenarios: list[str] | None = Field(None, description="Scenario names; omit for all")
+    repetitions: int = Field(1, ge=1, le=100)
+    concurrency: int = Field(1, ge=1, le=50)
+    delay: float = Field(0.0, ge=0, description="Minimum seconds between dials")
+
+
+class Run:
+    def __init__(self, run_id: str, spec: dict, calls: list[dict], created: str):
+        self.id = run_id
+        self.spec = spec
+        self.calls = calls
+        self.created = created
+        self.status = "queued"
+        self.task: asyncio.Task | None = None
+        self.subscribers: set[asyncio.Queue] = set()
+        self._journal_file = None
+
+    @property
+    def journal_path(self) -> Path:
+        return Path(RUNS_DIR) / f"{self.id}.jsonl"
+
+    def summary(self) -> dict:
+        counts: dict[str, int] = {}
+        for call in self.calls:
+            counts[call["status"]] = counts.get(call["status"], 0) + 1
+        return {
+            "run_id": self.id,
+            "status": self.status,
+            "created": self.created,
+            "spec": self.spec,
+            "counts": counts,
+        }
+
+    def snapshot(self) -> dict:
+        return {**self.summary(), "calls": self.calls}
+
+    def append(self, event: dict):
+        """Append one event to the journal, keeping the file open between writes."""
+        if self._journal_file is None:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            self._journal_file = open(self.journal_path, "a", encoding="utf-8")
+        self._journal_file.write(json.dumps(event) + "\n")
+        # Flush so a crash loses at most the event being written.
+        self._journal_file.flush()
+
+    def close_journal(self):
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+
+
+class Orchestrator:
+    def __init__(self):
+        self.runs: dict[str, Run] = {}
+        self._by_sid: dict[str, tuple[Run, dict]] = {}
+        self._finished: dict[str, asyncio.Event] = {}
+        self._dial_lock = asyncio.Lock()
+        self._last_dial = 0.0
+
+    # ── Journal ──
+
+    def _journal(self, run: Run, event: dict):
+        run.append({"ts": time.time(), **event})
+
+    def load_journals(self):
+        """Rebuild runs from ``runs/*.jsonl``. Unfinished runs become ``interrupted``."""
+        for path in sorted(Path(RUNS_DIR).glob("*.jsonl")):
+            run = None
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn final write from a crash
+                        continue
+                    if event["event"] == "submitted":
+                        run = Run(event["run_id"], event["spec"], event["calls"], event["created"])
+                    elif run is not None and event["event"] == "call":
+                        run.calls[event["index"]].update(event["fields"])
+                    elif run is not None and event["event"] == "run":
+                        run.status = event["status"]
+            if run is None or run.id in self.runs:
+                continue
+            if any(c["status"] not in TERMINAL for c in run.calls):
+                run.status = "interrupted"
+            else:
+                run.status = "completed"
+            self.runs[run.id] = run
+            for call in run.calls:
+                if call.get("call_sid") and call["status"] not in TERMINAL:
+                    self._by_sid[call["call_sid"]] = (run, call)
+        if self.runs:
+            interrupted = sum(1 for r in self.runs.values() if r.status == "interrupted")
+            logger.info("Loaded %d run(s) from journal, %d interrupted", len(self.runs), interrupted)
+
+    async def shutdown(self):
+        """Cancel running runs; their journals record them as interrupted."""
+        tasks = [r.task for r in self.runs.values() if r.task is not None and not r.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for run in self.runs.values():
+            run.close_journal()
+
+    # ── State changes ──
+
+    def _publish(self, run: Run, message: dict | None):
+        for queue in run.subscribers:
+            queue.put_nowait(message)
+
+    def _update_call(self, run: Run, call: dict, **fields):
+        call.update(fields)
+        self._journal(run, {"event": "call", "index": call["index"], "fields": fields})
+        self._publish(run, {"type": "call", "run_id": run.id, "call": dict(call)})
+
+    def _set_status(self, run: Run, status: str):
+        run.status = status
+        self._journal(run, {"event": "run", "status": status})
+        self._publish(run, {"type": "run", **run.summary()})
+
+    # ── Runs ──
+
+    def submit(self, request: RunRequest) -> Run:
+        if request.scenarios:
+            known = {s["name"] for s in SCENARIOS}
+            unknown = [n for n in request.scenarios if n not in known]
+            if unknown:
+                raise ValueError(f"Unknown scenario(s): {unknown}")
+            names = request.scenarios
+        else:
+            names = [s["name"] for s in SCENARIOS]
+
+        calls = [
+            {"index": i, "scenario": name, "repetition": rep, "status": "pending",
+             "call_sid": None, "attempts": 0, "turns": 0}
+            for i, (rep, name) in enumerate(
+                (rep, name) for rep in range(request.repetitions) for name in names
+            )
+        ]
+        run_id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+        created = datetime.now().isoformat(timespec="seconds")
+        run = Run(run_id, request.model_dump(), calls, created)
+        self.runs[run_id] = run
+        self._journal(run, {"event": "submitted", "run_id": run_id, "spec": run.spec,
+                            "calls": calls, "created": created})
+        logger.info("Run submitted  id=%s  calls=%d  concurrency=%d",
+                    run_id, len(calls), request.concurrency)
+        self._start(run)
+        return run
+
+    def resume(self, run: Run):
+        """Re-queue every call that didn't finish. Calls that were live when the
+        server stopped lost their conversation state, so they are dialled again."""
+        if run.task is not None and not run.task.done():
+            raise RuntimeError(f"Run {run.id} is already running")
+        for call in run.calls:
+            if call["status"] not in TERMINAL:
+                if call.get("call_sid"):
+                    self._by_sid.pop(call["call_sid"], None)
+                self._update_call(run, call, status="pending", call_sid=None)
+        logger.info("Run resumed  id=%s", run.id)
+        self._start(run)
+
+    def _start(self, run: Run):
+        run.task = asyncio.create_task(self._execute(run))
+
+    async def _execute(self, run: Run):
+        sem = asyncio.Semaphore(run.spec["concurrency"])
+
+        async def slot(call: dict):
+            async with sem:
+                try:
+                    await self._place(run, call)
+                except Exception as exc:
+                    logger.exception("Call %d of run %s failed", call["index"], run.id)
+                    self._fail_call(run, call, exc)
+
+        # Anything that escapes (cancellation included) leaves the run interrupted.
+        status = "interrupted"
+        try:
+            self._set_status(run, "running")
+            await asyncio.gather(*(slot(c) for c in run.calls if c["status"] == "pending"))
+            status = "completed"
+        except Exception:
+            # Nobody awaits the task, so log here rather than leave it unretrieved.
+            logger.exception("Run %s stopped early", run.id)
+        finally:
+            try:
+                self._set_status(run, status)
+            except Exception:
+                run.status = status
+                logger.exception("Could not journal status for run %s", run.id)
+            # Always release /events subscribers, whatever happened above.
+            self._publish(run, None)
+            run.close_journal()
+        logger.info("Run finished  id=%s  %s", run.id, run.summary()["counts"])
+
+    def _fail_call(self, run: Run, call: dict, exc: Exception):
+        try:
+            self._update_call(run, call, status="failed", error=str(exc))
+        except Exception:
+            call.update(status="failed", error=str(exc))
+            logger.exception("Could not journal failure for call %d of run %s", call["index"], run.id)
+
+    async def _place(self, run: Run, call: dict):
+        async with self._dial_lock:
+            wait = self._last_dial + run.spec["delay"] - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_dial = time.monotonic()
+            self._update_call(run, call, status="dialing", attempts=call["attempts"] + 1)
+
+        try:
+            sid = await asyncio.to_thread(make_call, call["scenario"], get_client())
+        except Exception as exc:
+            logger.warning("Dial failed  run=%s  scenario=%s: %s", run.id, call["scenario"], exc)
+            self._update_call(run, call, status="failed", error=str(exc))
+            return
+
+        finished = asyncio.Event()
+        self._finished[sid] = finished
+        self._by_sid[sid] = (run, call)
+        self._update_call(run, call, status="queued", call_sid=sid)
+
+        try:
+            await asyncio.wait_for(finished.wait(), CALL_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("No call-status for sid=%s after %ds", sid, CALL_TIMEOUT)
+            self._update_call(run, call, status="timeout")
+        finally:
+            self._finished.pop(sid, None)
+            self._by_sid.pop(sid, None)
+
+    # ── Webhook hooks ──
+
+    def call_started(self, call_sid: str):
+        entry = self._by_sid.get(call_sid)
+        if entry:
+            run, call = entry
+            self._update_call(run, call, status="in-progress")
+
+    def call_turn(self, call_sid: str, turn: int):
+        entry = self._by_sid.get(call_sid)
+        if entry:
+            run, call = entry
+            self._update_call(run, call, turns=turn)
+
+    def call_ended(self, call_sid: str, status: str, duration: int, transcript: str | None):
+        entry = self._by_sid.get(call_sid)
+        if entry:
+            run, call = entry
+            if status not in TERMINAL:
+                status = "completed"
+            self._update_call(run, call, status=status, duration=duration, transcript=transcript)
+        finished = self._finished.get(call_sid)
+        if finished:
+            finished.set()
+
+    # ── Streaming ──
+
+    async def events(self, run: Run):
+        """Yield Server-Sent Events: a snapshot, then every change until the run ends."""
+        queue: asyncio.Queue = asyncio.Queue()
+        run.subscribers.add(queue)
+        try:
+            yield f"event: snapshot\ndata: {json.dumps(run.snapshot())}\n\n"
+            if run.task is None or run.task.done():
+                return
+            while True:
+                message = await queue.get()
+                if message is None:
+                    yield f"event: done\ndata: {json.dumps(run.summary())}\n\n"
+                    return
+                yield f"event: {message['type']}\ndata: {json.dumps(message)}\n\n"
+        finally:
+            run.subscribers.discard(queue)
+
+
+orchestrator = Orchestrator()
+router = APIRouter(prefix="/runs", tags=["runs"])
+
+
+def _get_run(run_id: str) -> Run:
+    run = orchestrator.runs.get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"No run {run_id}")
+    return run
+
+
+@router.post("", status_code=202)
+async def submit_run(request: RunRequest):
+    error = config_error()
+    if error:
+        raise HTTPException(status_code=503, detail=error)
+    try:
+        run = orchestrator.submit(request)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return run.snapshot()
+
+
+@router.get("")
+async def list_runs():
+    return [run.summary() for run in orchestrator.runs.values()]
+
+
+@router.get("/{run_id}")
+async def get_run(run_id: str):
+    return _get_run(run_id).snapshot()
+
+
+@router.get("/{run_id}/events")
+async def run_events(run_id: str):
+    run = _get_run(run_id)
+    return StreamingResponse(orchestrator.events(run), media_type="text/event-stream")
+
+
+@router.post("/{run_id}/resume", status_code=202)
+async def resume_run(run_id: str):
+    run = _get_run(run_id)
+    error = config_error()
+    if error:
+        raise HTTPException(status_code=503, detail=error)
+    try:
+        orchestrator.resume(run)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return run.snapshot()
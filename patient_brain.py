@@ -1,10 +1,11 @@
+import re
 import logging
 
-from openai import AsyncOpenAI
+from llm_backends import BackendRouter
 
 logger = logging.getLogger(__name__)
 
-client = AsyncOpenAI()
+router = BackendRouter.from_env()
 
 BASE_SYSTEM_PROMPT = """\
 You are a patient calling a medical or dental office. Stay in character for the entire call.
@@ -30,6 +31,14 @@ message — word for word. Do not paraphrase, do not change any names, \
 do not add or remove anything. Your first message must be that exact line.\
 """
 
+_SENTENCE_END = re.compile(r"[.!?](?=\s|$)")
+
+
+def _trim_to_sentence(text: str) -> str:
+    """Drop a trailing partial sentence from a reply that hit the token cap."""
+    ends = [m.end() for m in _SENTENCE_END.finditer(text)]
+    return text[:ends[-1]] if ends else text
+
 
 async def get_patient_response(
     scenario: dict,
@@ -56,16 +65,14 @@ async def get_patient_response(
 
     messages.append({"role": "user", "content": agent_text})
 
-    response = await client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=messages,
-        max_tokens=200,
-        temperature=0.8,
-    )
+    response = await router.complete(messages, temperature=0.8)
 
-    raw = response.choices[0].message.content or ""
+    choice = response.choices[0]
+    raw = choice.message.content or ""
     end_call = "[END]" in raw
     text = raw.replace("[END]", "").strip()
+    if choice.finish_reason == "length":
+        text = _trim_to_sentence(text)
 
     if not text:
         text = "Could you repeat that?"
@@ -0,0 +1,325 @@
+"""Bulk-download Twilio call recordings and index them against transcripts."""
+
+import os
+import sys
+import json
+import asyncio
+import hashlib
+import argparse
+import logging
+from pathlib import Path
+
+import httpx
+from dotenv import load_dotenv
+
+from transcript_logger import TRANSCRIPT_DIR
+
+load_dotenv()
+
+logger = logging.getLogger("recordings_fetcher")
+
+TWILIO_SID = os.getenv("TWILIO_ACCOUNT_SID", "")
+TWILIO_TOKEN = os.getenv("TWILIO_AUTH_TOKEN", "")
+# Point at a local stand-in for testing, e.g. http://127.0.0.1:8081
+TWILIO_API_BASE = os.getenv("TWILIO_API_BASE", "https://api.twilio.com").rstrip("/")
+
+RECORDINGS_DIR = "recordings"
+INDEX_FILE = "index.json"
+DEFAULT_CONCURRENCY = 8
+CHUNK_SIZE = 64 * 1024
+
+
+def load_transcript_index(directory: str = TRANSCRIPT_DIR) -> dict[str, str]:
+    """Map full CallSid -> transcript path, read from each file's header."""
+    index: dict[str, str] = {}
+    for path in Path(directory).glob("*.txt"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("CALL SID:"):
+                    index[line.split(":", 1)[1].strip()] = str(path)
+                    break
+                if line.startswith("[") or line.startswith("--- CALL ENDED"):
+                    break
+    return index
+
+
+def load_index(directory: str = RECORDINGS_DIR) -> dict[str, dict]:
+    path = Path(directory) / INDEX_FILE
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_index(index: dict[str, dict], directory: str = RECORDINGS_DIR):
+    path = Path(directory) / INDEX_FILE
+    tmp = path.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _content_range_total(header: str | None) -> int | None:
+    """Total length from ``Content-Range: bytes a-b/N`` or ``bytes */N``."""
+    if not header or "/" not in header:
+        return None
+    total = header.rsplit("/", 1)[1].strip()
+    return int(total) if total.isdigit() else None
+
+
+class RecordingsFetcher:
+    """Lists and downloads recordings over one pooled ``httpx.AsyncClient``."""
+
+    def __init__(
+        self,
+        account_sid: str = TWILIO_SID,
+        auth_token: str = TWILIO_TOKEN,
+        api_base: str = TWILIO_API_BASE,
+        out_dir: str = RECORDINGS_DIR,
+        concurrency: int = DEFAULT_CONCURRENCY,
+    ):
+        self.account_sid = account_sid
+        self.api_base = api_base.rstrip("/")
+        self.out_dir = Path(out_dir)
+        self.concurrency = concurrency
+        self._client = httpx.AsyncClient(
+            auth=(account_sid, auth_token),
+            timeout=60.0,
+            # Recording media redirects to a signed storage URL
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=concurrency,
+                max_keepalive_connections=concurrency,
+            ),
+        )
+
+    async def close(self):
+        await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _account_url(self, path: str) -> str:
+        return f"{self.api_base}/2010-04-01/Accounts/{self.account_sid}/{path}"
+
+    async def list_recordings(
+        self,
+        call_sids: list[str] | None = None,
+        since: str | None = None,
+    ) -> list[dict]:
+        """List recordings for the given calls, or everything created after ``since``."""
+        if call_sids:
+            pages = await asyncio.gather(
+                *(self._list_pages({"CallSid": sid}) for sid in call_sids),
+                return_exceptions=True,
+            )
+            recordings: list[dict] = []
+            for sid, page in zip(call_sids, pages):
+                if isinstance(page, Exception):
+                    logger.error("Listing failed for call %s: %r", sid, page)
+                    continue
+                recordings.extend(page)
+            return recordings
+        params = {"PageSize": 1000}
+        if since:
+            params["DateCreated>"] = since
+        return await self._list_pages(params)
+
+    async def _list_pages(self, params: dict) -> list[dict]:
+        recordings: list[dict] = []
+        url: str | None = self._account_url("Recordings.json")
+        while url:
+            resp = await self._client.get(url, params=params)
+            resp.raise_for_status()
+            data = resp.json()
+            recordings.extend(data.get("recordings", []))
+            next_uri = data.get("next_page_uri")
+            # next_page_uri already carries the query string
+            url = f"{self.api_base}{next_uri}" if next_uri else None
+            params = None
+        return recordings
+
+    async def download(self, recording: dict, index: dict[str, dict]) -> dict:
+        """Download one recording as MP3, resuming a partial file if present.
+
+        Returns the index entry. A file already recorded in the index is kept
+        only if its size and SHA-256 still match. A finished file with no index
+        entry (the run stopped before the index was saved) is adopted as is —
+        it only gets its final name once the full body has arrived.
+        """
+        rec_sid = recording["sid"]
+        dest = self.out_dir / f"{recording['call_sid']}_{rec_sid}.mp3"
+        part = dest.with_suffix(".mp3.part")
+
+        existing = index.get(rec_sid)
+        if existing and dest.exists():
+            if dest.stat().st_size == existing["bytes"] and _sha256(dest) == existing["sha256"]:
+                return existing
+            logger.warning("Checksum mismatch for %s — re-downloading", rec_sid)
+            dest.unlink()
+        elif dest.exists():
+            logger.info("Adopting unindexed download %s", dest)
+            return self._entry(recording, dest)
+
+        url = self._account_url(f"Recordings/{rec_sid}.mp3")
+        if not await self._fetch(url, part, rec_sid):
+            # The .part file didn't match the recording; start over once.
+            part.unlink(missing_ok=True)
+            await self._fetch(url, part, rec_sid)
+
+        os.replace(part, dest)
+        return self._entry(recording, dest)
+
+    async def _fetch(self, url: str, part: Path, rec_sid: str) -> bool:
+        """Fill ``part`` with the full recording, resuming from its current size.
+
+        Returns False if an existing ``.part`` can't be resumed — the server
+        says it is already at or past the end but its size doesn't match.
+        """
+        offset = part.stat().st_size if part.exists() else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        async with self._client.stream("GET", url, headers=headers) as resp:
+            if resp.status_code == 416:
+                # Range starts at or past the end: only complete if the size is exact.
+                total = _content_range_total(resp.headers.get("Content-Range"))
+                if total is not None and offset == total:
+                    return True
+                logger.warning(
+                    "Discarding %s for %s: %d bytes, recording is %s",
+                    part.name, rec_sid, offset, total if total is not None else "unknown",
+                )
+                return False
+
+            resp.raise_for_status()
+            if offset and resp.status_code != 206:
+                offset = 0
+            total = _content_range_total(resp.headers.get("Content-Range"))
+            if total is None and resp.headers.get("Content-Length") is not None:
+                total = offset + int(resp.headers["Content-Length"])
+            with open(part, "ab" if offset else "wb") as f:
+                async for chunk in resp.aiter_bytes(CHUNK_SIZE):
+                    f.write(chunk)
+
+        size = part.stat().st_size
+        if total is not None and size != total:
+            raise IOError(f"Size mismatch for {rec_sid}: got {size} of {total} bytes")
+        return True
+
+    @staticmethod
+    def _entry(recording: dict, dest: Path) -> dict:
+        return {
+            "recording_sid": recording["sid"],
+            "call_sid": recording["call_sid"],
+            "path": str(dest),
+            "bytes": dest.stat().st_size,
+            "sha256": _sha256(dest),
+            "duration": recording.get("duration"),
+            "date_created": recording.get("date_created"),
+        }
+
+    async def fetch_all(
+        self,
+        call_sids: list[str] | None = None,
+        since: str | None = None,
+    ) -> dict[str, dict]:
+        """List, download and index recordings. Returns the updated index."""
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        index = load_index(str(self.out_dir))
+        transcripts = load_transcript_index()
+
+        recordings = await self.list_recordings(call_sids, since)
+        logger.info("Found %d recording(s)", len(recordings))
+
+        sem = asyncio.Semaphore(self.concurrency)
+        failed = 0
+
+        async def worker(rec: dict):
+            nonlocal failed
+            async with sem:
+                try:
+                    entry = await self.download(rec, index)
+                except Exception as exc:
+                    failed += 1
+                    logger.error("Failed %s (call %s): %r", rec.get("sid"), rec.get("call_sid"), exc)
+                    return
+            entry["transcript"] = transcripts.get(entry["call_sid"])
+            index[entry["recording_sid"]] = entry
+            # Persist as we go so an interrupted run keeps everything it finished.
+            save_index(index, str(self.out_dir))
+            logger.info("Recording ready  %s -> %s", entry["recording_sid"], entry["path"])
+
+        await asyncio.gather(*(worker(rec) for rec in recordings))
+        save_index(index, str(self.out_dir))
+
+        logger.info(
+            "Done. %d indexed, %d failed, %d linked to transcripts.",
+            len(index), failed, sum(1 for e in index.values() if e.get("transcript")),
+        )
+        return index
+
+
+async def fetch_recordings(
+    call_sids: list[str] | None = None,
+    since: str | None = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    out_dir: str = RECORDINGS_DIR,
+) -> dict[str, dict]:
+    async with RecordingsFetcher(concurrency=concurrency, out_dir=out_dir) as fetcher:
+        return await fetcher.fetch_all(call_sids, since)
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s  %(levelname)-8s  %(message)s",
+    )
+
+    parser = argparse.ArgumentParser(description="Download Twilio call recordings")
+    parser.add_argument(
+        "--call-sid", "-c",
+        nargs="*",
+        help="Fetch recordings for these CallSids. Omit to use every transcript in transcripts/.",
+    )
+    parser.add_argument(
+        "--since",
+        help="Fetch all recordings created after this date (YYYY-MM-DD) instead",
+    )
+    parser.add_argument(
+        "--concurrency", "-j",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Parallel downloads (default {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--out", "-o",
+        default=RECORDINGS_DIR,
+        help=f"Output directory (default {RECORDINGS_DIR}/)",
+    )
+    args = parser.parse_args()
+
+    if not TWILIO_SID or not TWILIO_TOKEN:
+        sys.exit("ERROR: Twilio credentials are missing from .env")
+
+    call_sids = args.call_sid
+    if not call_sids and not args.since:
+        call_sids = list(load_transcript_index())
+        if not call_sids:
+            sys.exit("ERROR: No transcripts found — pass --call-sid or --since.")
+
+    asyncio.run(fetch_recordings(call_sids, args.since, args.concurrency, args.out))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""Local stand-in for the Twilio Recordings API, plus a self-check for the fetcher.
+
+    python recordings_standin.py --serve           # serve fake recordings on :8081
+    python recordings_standin.py --check           # run the fetcher against it
+
+Point the fetcher at the stand-in with ``TWILIO_API_BASE=http://127.0.0.1:8081``.
+The stand-in paginates ``Recordings.json``, honours ``Range`` on ``.mp3``
+(206 / 416 with ``Content-Range``), returns 404 for listings of unknown calls,
+and can cut a download short once to exercise resume.
+"""
+
+import os
+import sys
+import json
+import random
+import asyncio
+import hashlib
+import argparse
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ACCOUNT_SID = "ACstandin"
+PAGE_SIZE = 1  # small, so per-call listings span several pages
+
+
+class StandinState:
+    """Recordings served by the stand-in and a log of the requests it saw."""
+
+    def __init__(self, recordings: dict[str, dict], missing_calls: set[str] = frozenset()):
+        # recording sid -> {"call_sid", "body"}
+        self.recordings = recordings
+        self.missing_calls = set(missing_calls)
+        self.truncate_once: set[str] = set()
+        self.requests: list[tuple[str, str | None]] = []
+        self.lock = threading.Lock()
+
+    def listing(self, call_sid: str | None) -> list[dict]:
+        return [
+            {"sid": sid, "call_sid": rec["call_sid"], "duration": "60",
+             "date_created": "Wed, 25 Feb 2026 10:33:54 +0000"}
+            for sid, rec in sorted(self.recordings.items())
+            if call_sid is None or rec["call_sid"] == call_sid
+        ]
+
+
+def _make_handler(state: StandinState):
+    prefix = f"/2010-04-01/Accounts/{ACCOUNT_SID}/Recordings"
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: bytes, content_type: str, extra: dict | None = None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (extra or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            with state.lock:
+                state.requests.append((url.path, self.headers.get("Range")))
+
+            if url.path == f"{prefix}.json":
+                self._list(parse_qs(url.query))
+            elif url.path.startswith(f"{prefix}/") and url.path.endswith(".mp3"):
+                self._media(url.path[len(prefix) + 1:-len(".mp3")])
+            else:
+                self._send(404, b'{"message": "not found"}', "application/json")
+
+        def _list(self, query: dict):
+            call_sid = query.get("CallSid", [None])[0]
+            if call_sid in state.missing_calls:
+                self._send(404, b'{"message": "not found"}', "application/json")
+                return
+            page = int(query.get("Page", ["0"])[0])
+            items = state.listing(call_sid)
+            chunk = items[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+            next_uri = None
+            if (page + 1) * PAGE_SIZE < len(items):
+                q = f"Page={page + 1}" + (f"&CallSid={call_sid}" if call_sid else "")
+                next_uri = f"{prefix}.json?{q}"
+            body = json.dumps({"recordings": chunk, "next_page_uri": next_uri}).encode()
+            self._send(200, body, "application/json")
+
+        def _media(self, rec_sid: str):
+            rec = state.recordings.get(rec_sid)
+            if rec is None:
+                self._send(404, b"", "audio/mpeg")
+                return
+            body = rec["body"]
+            total = len(body)
+            start = 0
+            range_header = self.headers.get("Range")
+            if range_header and range_header.startswith("bytes="):
+                start = int(range_header[len("bytes="):].split("-", 1)[0])
+                if start >= total:
+                    self._send(416, b"", "audio/mpeg", {"Content-Range": f"bytes */{total}"})
+                    return
+
+            status = 206 if range_header else 200
+            extra = {"Content-Range": f"bytes {start}-{total - 1}/{total}"} if range_header else {}
+            payload = body[start:]
+
+            with state.lock:
+                cut = rec_sid in state.truncate_once
+                state.truncate_once.discard(rec_sid)
+            if cut:
+                # Promise the full body, send half, drop the connection.
+                self.send_response(status)
+                self.send_header("Content-Type", "audio/mpeg")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in extra.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload[:len(payload) // 2])
+                self.wfile.flush()
+                self.close_connection = True
+                return
+            self._send(status, payload, "audio/mpeg", extra)
+
+    return Handler
+
+
+def start_standin(state: StandinState, port: int = 0) -> ThreadingHTTPServer:
+    """Start the stand-in on a background thread. ``server.server_port`` has the port."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _sample_state() -> StandinState:
+    rng = random.Random(0)
+    recordings = {}
+    for i, call in enumerate(["CA" + "1" * 32, "CA" + "1" * 32, "CA" + "2" * 32, "CA" + "3" * 32]):
+        recordings[f"RE{i:032d}"] = {"call_sid": call, "body": rng.randbytes(200_000 + i)}
+    return StandinState(recordings, missing_calls={"CA" + "4" * 32})
+
+
+# ── Self-check ──────────────────────────────────────────────────────────
+
+def _sha(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+async def run_check() -> list[str]:
+    """Exercise the fetcher against the stand-in. Returns a list of failures."""
+    from recordings_fetcher import RecordingsFetcher, save_index
+
+    state = _sample_state()
+    server = start_standin(state)
+    base = f"http://127.0.0.1:{server.server_port}"
+    call_sids = sorted({r["call_sid"] for r in state.recordings.values()}) + ["CA" + "4" * 32]
+    failures: list[str] = []
+
+    def expect(cond: bool, message: str):
+        print(f"  {'ok  ' if cond else 'FAIL'} {message}")
+        if not cond:
+            failures.append(message)
+
+    async def fetch(out: str) -> dict:
+        async with RecordingsFetcher(ACCOUNT_SID, "token", base, out, concurrency=4) as fetcher:
+            return await fetcher.fetch_all(call_sids)
+
+    def intact(index: dict, sid: str) -> bool:
+        entry = index.get(sid)
+        return (
+            entry is not None
+            and entry["sha256"] == _sha(state.recordings[sid]["body"])
+            and Path(entry["path"]).read_bytes() == state.recordings[sid]["body"]
+        )
+
+    cut_sid = "RE" + "1".zfill(32)
+    try:
+        with tempfile.TemporaryDirectory() as out:
+            print("interrupted download + missing listing")
+            state.truncate_once.add(cut_sid)
+            index = await fetch(out)
+            others = [s for s in state.recordings if s != cut_sid]
+            expect(all(intact(index, s) for s in others), "other recordings indexed despite the 404 listing")
+            expect(cut_sid not in index, "cut-off recording not indexed")
+            part = next(Path(out).glob(f"*_{cut_sid}.mp3.part"), None)
+            expect(part is not None and part.stat().st_size > 0, "partial .part file kept")
+
+            print("resume")
+            state.requests.clear()
+            index = await fetch(out)
+            expect(intact(index, cut_sid), "resumed recording matches the source")
+            ranges = [r for p, r in state.requests if p.endswith(f"{cut_sid}.mp3")]
+            expect(bool(ranges) and ranges[0] is not None and ranges[0] != "bytes=0-",
+                   "resume used a Range request")
+            media = [p for p, _ in state.requests if p.endswith(".mp3") and cut_sid not in p]
+            expect(not media, "already-indexed recordings not downloaded again")
+
+            print("corruption")
+            victim = others[0]
+            Path(index[victim]["path"]).write_bytes(b"corrupt")
+            index = await fetch(out)
+            expect(intact(index, victim), "corrupted file re-downloaded")
+
+            print("oversized .part (416)")
+            victim = others[1]
+            dest = Path(index[victim]["path"])
+            dest.with_suffix(".mp3.part").write_bytes(os.urandom(len(state.recordings[victim]["body"]) + 10))
+            dest.unlink()
+            index.pop(victim)
+            save_index(index, out)
+            index = await fetch(out)
+            expect(intact(index, victim), "bad .part discarded and recording re-downloaded")
+    finally:
+        server.shutdown()
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Twilio Recordings API")
+    parser.add_argument("--serve", action="store_true", help="Serve sample recordings until interrupted")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--check", action="store_true", help="Run the fetcher self-check and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s  %(levelname)-8s  %(message)s")
+
+    if args.check:
+        failures = asyncio.run(run_check())
+        print(f"\n{'All checks passed.' if not failures else f'{len(failures)} check(s) failed.'}")
+        sys.exit(1 if failures else 0)
+
+    if args.serve:
+        state = _sample_state()
+        server = start_standin(state, args.port)
+        print(f"Serving {len(state.recordings)} recordings for {ACCOUNT_SID} on http://127.0.0.1:{server.server_port}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
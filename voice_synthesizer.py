@@ -11,7 +11,7 @@ ELEVENLABS_URL = "https://api.elevenlabs.io/v1/text-to-speech"
 
 
 async def synthesize_speech(text: str) -> str:
-    """Convert text to speech via ElevenLabs. Returns the audio filename."""
+    """Convert text to speech via ElevenLabs. Returns the path relative to AUDIO_DIR."""
     voice_id = os.getenv("ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM")
     api_key = os.getenv("ELEVENLABS_API_KEY", "")
 
@@ -34,9 +34,11 @@ async def synthesize_speech(text: str) -> str:
         resp = await client.post(url, json=payload, headers=headers)
         resp.raise_for_status()
 
-    filename = f"{uuid.uuid4()}.mp3"
-    filepath = os.path.join(AUDIO_DIR, filename)
-    os.makedirs(AUDIO_DIR, exist_ok=True)
+    # Shard by the first two hex digits so no single directory grows unbounded.
+    name = uuid.uuid4().hex
+    filename = f"{name[:2]}/{name}.mp3"
+    filepath = os.path.join(AUDIO_DIR, name[:2], f"{name}.mp3")
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
 
     with open(filepath, "wb") as f:
         f.write(resp.content)